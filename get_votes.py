@@ -1,46 +1,165 @@
-import os
-import requests
-from xml.etree import ElementTree as ET
+import time
+import shelve
+import asyncio
+from io import BytesIO
+from itertools import repeat
+from lxml import etree
 import sqlite3
 import pandas as pd
 
+from votes_common import (
+    ACTIONS_LIMIT, CONNECTOR_LIMIT, CONNECTOR_LIMIT_PER_HOST, REQUEST_TIMEOUT,
+    _bills_filter, _empty_vote_matrix, _make_context, _page_actions, _run,
+    _vote_matrix,
+)
+from votes_common import FetchContext, compute_member_total_scores  # noqa: F401 (public API)
 
-def fetch_house_bill_votes(congress, bill_type, bill_number, api_key=None):
+try:
+    import aiohttp
+except ImportError:             # no aiohttp → fetch bills serially with requests
+    aiohttp = None
+
+try:
+    from orjson import loads as json_loads
+except ImportError:             # no orjson → stdlib json (same objects, slower)
+    from json import loads as json_loads
+
+
+# actionCodes of a House roll-call vote on the bill
+ROLL_CALL_CODES = ("H37100", "H37300")
+
+# Per-legislator fields a fetch returns, one list per field, in the
+# order they follow congress/bill_type/bill_number in bill_votes
+VOTE_COLUMNS = ("member_id", "name", "state", "party", "role", "vote_position")
+
+# On-disk HTTP cache. Actions pages can still grow, so they expire after a
+# day; Clerk roll-call XML never changes once the vote is final.
+CACHE_PATH  = "congress_cache"
+ACTIONS_TTL = 24 * 60 * 60      # seconds
+
+
+def _cache_key(url, params=None):
+    """Cache key for a GET; the API key is left out so a new key keeps hits."""
+    params = {k: v for k, v in (params or {}).items() if k != "api_key"}
+    return url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+
+def _cache_get(key, ttl=None):
+    """Cached body for `key`, or None if missing / older than `ttl` seconds."""
+    with shelve.open(CACHE_PATH) as db:
+        hit = db.get(key)
+    if hit is None:
+        return None
+    stored_at, body = hit
+    if ttl is not None and time.time() - stored_at > ttl:
+        return None
+    return body
+
+
+def _cache_put(key, body):
+    with shelve.open(CACHE_PATH) as db:
+        db[key] = (time.time(), body)
+
+
+def _cached_get(session, url, params=None, ttl=None):
+    """GET `url` and return the body, served from the on-disk cache when fresh."""
+    key = _cache_key(url, params)
+    body = _cache_get(key, ttl)
+    if body is None:
+        resp = session.get(url, params=params)
+        resp.raise_for_status()
+        body = resp.content
+        _cache_put(key, body)
+    return body
+
+
+async def _acached_get(session, url, params=None, ttl=None):
+    """aiohttp counterpart of _cached_get()."""
+    key = _cache_key(url, params)
+    body = _cache_get(key, ttl)
+    if body is None:
+        async with session.get(url, params=params) as resp:
+            resp.raise_for_status()
+            body = await resp.read()
+        _cache_put(key, body)
+    return body
+
+
+def _latest_roll_call_url(actions, congress, bill_type, bill_number):
+    """
+    Pick the most recent House roll-call out of a bill's actions and
+    return the URL of its Clerk EVS XML.
+    """
+    if not actions:
+        raise RuntimeError(f"No actions for {bill_type.upper()}.{bill_number} in {congress}.")
+
+    # Now filter safely
+    roll_calls = [
+        a for a in actions
+        if a.get("actionCode") in ROLL_CALL_CODES
+    ]
+    if not roll_calls:
+        raise RuntimeError(f"No roll-call found for {bill_type.upper()}.{bill_number}.")
+    last_vote = roll_calls[0]
+    print(last_vote)
+
+    # Extract Clerk EVS XML URL
+    recorded = last_vote.get("recordedVotes", [])
+    if recorded and recorded[0].get("url"):
+        return recorded[0]["url"]
+    evs_path = last_vote.get("link") or last_vote.get("relatedLink")
+    if not evs_path:
+        raise RuntimeError("No EVS URL on roll-call action.")
+    return f"https://clerk.house.gov{evs_path}"
+
+
+def _parse_house_votes(content):
+    """
+    Turn Clerk EVS XML bytes into parallel per-field lists, one entry per
+    legislator, keyed by VOTE_COLUMNS.
+    """
+    member_ids, names, states, parties, roles, positions = [], [], [], [], [], []
+    for _, rv in etree.iterparse(BytesIO(content), events=("end",), tag="recorded-vote"):
+        leg = rv.find("legislator")
+        vote_elem = rv.find("vote")
+        if leg is not None and vote_elem is not None:
+            member_ids.append(leg.attrib.get("name-id"))
+            names.append(leg.text.strip())
+            states.append(leg.attrib.get("state"))
+            parties.append(leg.attrib.get("party"))
+            roles.append(leg.attrib.get("role"))
+            positions.append(vote_elem.text.strip())
+        # free this element and the siblings already handled
+        rv.clear()
+        while rv.getprevious() is not None:
+            del rv.getparent()[0]
+    return dict(zip(VOTE_COLUMNS, (member_ids, names, states, parties, roles, positions)))
+
+
+def fetch_house_bill_votes(congress, bill_type, bill_number, api_key=None, ctx=None):
     """
     Fetches the most recent roll-call vote for one House/Senate bill.
-    Returns a list of dicts: one dict per legislator’s vote.
+    Returns a dict of equal-length lists keyed by VOTE_COLUMNS:
+    one entry per legislator’s vote.
+
+    Pass a FetchContext as `ctx` to reuse one key/session across bills.
     """
-    key = api_key or os.getenv("CONGRESS_API_KEY")
-    if not key:
-        raise RuntimeError("Set CONGRESS_API_KEY or pass api_key explicitly.")
+    ctx = ctx or _make_context(api_key)
 
     # 1) Get the bill’s actions
-    base_url   = "https://api.congress.gov/v3"
-    actions_ep = f"{base_url}/bill/{congress}/{bill_type}/{bill_number}/actions"
+    actions_ep = f"{ctx.base_url}/bill/{congress}/{bill_type}/{bill_number}/actions"
 
     all_actions = []
-    limit = 250
     offset = 0
 
     while True:
-        resp = requests.get(
+        payload = json_loads(_cached_get(
+            ctx.session,
             actions_ep,
-            params={
-                "format": "json",
-                "api_key": key,
-                "limit": limit,
-                "offset": offset,
-            }
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-
-        # Try both possible locations for the array
-        page_actions = (
-                payload.get("data", {}).get("actions")
-                or payload.get("actions")
-                or []
-        )
+            params=dict(ctx.params, offset=offset),
+            ttl=ACTIONS_TTL,
+        ))
+        page_actions = _page_actions(payload)
 
         # Debug: show what keys we have and how many we got
         print("Payload keys:", list(payload.keys()))
@@ -51,61 +170,75 @@ def fetch_house_bill_votes(congress, bill_type, bill_number, api_key=None):
 
         all_actions.extend(page_actions)
 
-        if len(page_actions) < limit:
+        if len(page_actions) < ACTIONS_LIMIT:
             # last page
             break
 
-        offset += limit
+        # Actions come newest first, so once a page holds a roll-call the
+        # latest one is already in hand – skip the rest of the history.
+        if any(a.get("actionCode") in ROLL_CALL_CODES for a in page_actions):
+            break
 
-    actions = all_actions
-    if not actions:
-        raise RuntimeError(f"No actions for {bill_type.upper()}.{bill_number} in {congress}.")
+        offset += ACTIONS_LIMIT
 
-    # Now filter safely
-    roll_calls = [
-        a for a in actions
-        if a.get("actionCode") in ("H37100", "H37300")
-    ]
-    if not roll_calls:
-        raise RuntimeError(f"No roll-call found for {bill_type.upper()}.{bill_number}.")
-    last_vote = roll_calls[0]
-    print(last_vote)
+    # 2) Find the latest roll-call and its Clerk EVS XML URL
+    evs_url = _latest_roll_call_url(all_actions, congress, bill_type, bill_number)
 
+    # 3) Download & parse the XML
+    content = _cached_get(ctx.session, evs_url)
+    return _parse_house_votes(content)
 
-    # 3) Extract Clerk EVS XML URL
-    recorded = last_vote.get("recordedVotes", [])
-    if recorded and recorded[0].get("url"):
-        evs_url = recorded[0]["url"]
-    else:
-        evs_path = last_vote.get("link") or last_vote.get("relatedLink")
-        if not evs_path:
-            raise RuntimeError("No EVS URL on roll-call action.")
-        evs_url = f"https://clerk.house.gov{evs_path}"
-
-    # 4) Download & parse the XML
-    xml = requests.get(evs_url)
-    xml.raise_for_status()
-    root = ET.fromstring(xml.content)
-
-    # 5) Build vote records
-    votes = []
-    for rv in root.findall(".//recorded-vote"):
-        leg = rv.find("legislator")
-        vote_elem = rv.find("vote")
-        if leg is None or vote_elem is None:
-            continue
-        votes.append({
-            "congress":      congress,
-            "bill_type":     bill_type,
-            "bill_number":   bill_number,
-            "member_id":     leg.attrib.get("name-id"),
-            "name":          leg.text.strip(),
-            "state":         leg.attrib.get("state"),
-            "party":         leg.attrib.get("party"),
-            "role":          leg.attrib.get("role"),
-            "vote_position": vote_elem.text.strip()
-        })
-    return votes
+
+async def _afetch_house_bill_votes(ctx, congress, bill_type, bill_number):
+    """
+    Async twin of fetch_house_bill_votes(): same requests, issued through
+    the context's shared aiohttp session so many bills can be in flight.
+    """
+    actions_ep = f"{ctx.base_url}/bill/{congress}/{bill_type}/{bill_number}/actions"
+
+    all_actions = []
+    offset = 0
+
+    while True:
+        payload = json_loads(await _acached_get(
+            ctx.session,
+            actions_ep,
+            params=dict(ctx.params, offset=offset),
+            ttl=ACTIONS_TTL,
+        ))
+        page_actions = _page_actions(payload)
+
+        if not page_actions:
+            break
+
+        all_actions.extend(page_actions)
+
+        if len(page_actions) < ACTIONS_LIMIT:
+            break
+
+        # newest first: the latest roll-call is on this page already
+        if any(a.get("actionCode") in ROLL_CALL_CODES for a in page_actions):
+            break
+
+        offset += ACTIONS_LIMIT
+
+    evs_url = _latest_roll_call_url(all_actions, congress, bill_type, bill_number)
+
+    content = await _acached_get(ctx.session, evs_url)
+    return _parse_house_votes(content)
+
+
+async def _afetch_batch(bills, api_key=None):
+    """Fetch every bill's votes concurrently; results come back in `bills` order."""
+    connector = aiohttp.TCPConnector(limit=CONNECTOR_LIMIT,
+                                     limit_per_host=CONNECTOR_LIMIT_PER_HOST)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        ctx = _make_context(api_key, session)
+        return await asyncio.gather(*[
+            _afetch_house_bill_votes(ctx, congress, bill_type, bill_number)
+            for congress, bill_type, bill_number in bills
+        ])
 
 
 def fetch_and_store_batch(bills, db_path="votes.db", api_key=None):
@@ -114,6 +247,9 @@ def fetch_and_store_batch(bills, db_path="votes.db", api_key=None):
     fetch each bill’s votes and store them in an SQLite table.
     """
     conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
     c = conn.cursor()
     c.execute("""
     CREATE TABLE IF NOT EXISTS bill_votes (
@@ -129,19 +265,28 @@ def fetch_and_store_batch(bills, db_path="votes.db", api_key=None):
         PRIMARY KEY(congress, bill_type, bill_number, member_id)
     )""")
 
-    for congress, bill_type, bill_number in bills:
-        votes = fetch_house_bill_votes(congress, bill_type, bill_number, api_key)
-        for v in votes:
-            c.execute("""
-            INSERT OR IGNORE INTO bill_votes (
-                congress, bill_type, bill_number,
-                member_id, name, state, party, role, vote_position
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", (
-                congress, bill_type, bill_number,
-                v["member_id"], v["name"], v["state"],
-                v["party"], v["role"], v["vote_position"]
-            ))
-        conn.commit()
+    if aiohttp is not None:
+        results = _run(_afetch_batch(bills, api_key))
+    else:
+        ctx = _make_context(api_key)
+        results = [fetch_house_bill_votes(congress, bill_type, bill_number, ctx=ctx)
+                   for congress, bill_type, bill_number in bills]
+
+    # Stream every bill's rows through a single executemany, inside one
+    # transaction for the whole batch instead of a commit per bill. Rows are
+    # zipped straight out of the per-field lists.
+    rows = (
+        row
+        for (congress, bill_type, bill_number), votes in zip(bills, results)
+        for row in zip(repeat(congress), repeat(bill_type), repeat(bill_number),
+                       *(votes[col] for col in VOTE_COLUMNS))
+    )
+    with conn:
+        c.executemany("""
+        INSERT OR IGNORE INTO bill_votes (
+            congress, bill_type, bill_number,
+            member_id, name, state, party, role, vote_position
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
     conn.close()
 
 
@@ -149,99 +294,26 @@ def build_vote_matrix(bills, db_path="votes.db"):
     """
     Build a matrix (DataFrame) of vote positions: rows=Members, columns=Bills.
     """
+    if not bills:                   # nothing to filter on – empty matrix
+        return _empty_vote_matrix()
+
+    # Only read the requested bills, via the primary-key index
+    where, params = _bills_filter(bills)
+
     conn = sqlite3.connect(db_path)
-    df = pd.read_sql_query("SELECT * FROM bill_votes", conn)
+    df = pd.read_sql_query("SELECT * FROM bill_votes WHERE " + where, conn, params=params)
     conn.close()
 
-    bills_df = pd.DataFrame(bills, columns=["congress","bill_type","bill_number"])
-    bills_df["bill_number"] = bills_df["bill_number"].astype(str)
-    df = df.merge(bills_df, on=["congress","bill_type","bill_number"], how="inner")
+    # Low-cardinality text columns as categoricals: small integer codes
+    # instead of one Python string per row
+    df = df.astype({col: "category" for col in
+                    ("bill_type", "state", "party", "role", "vote_position")})
+
     df["bill_id"] = df["bill_type"].str.upper() + "." + df["bill_number"]
 
-    vote_matrix = df.pivot_table(index="member_id",
-                           columns="bill_id",
-                           values="vote_position",
-                                 aggfunc="last")
-    rep_info = (
-        df[["name", "state", "party", "member_id"]]
-        .drop_duplicates()
-        .set_index("member_id"))
-    vote_matrix = rep_info.join(vote_matrix)
-    return vote_matrix
-
-def compute_member_total_scores(
-    vote_matrix: pd.DataFrame,
-    scoring_rules: dict[str, dict[str, float]],
-    default_score: float = 0.0
-) -> pd.Series:
-    """
-    Given a vote-string matrix and per-bill scoring rules, compute each
-    member’s total score.
-
-    Parameters
-    ----------
-    vote_matrix : pd.DataFrame
-        Rows are member_id, columns are bill_id, values are vote strings
-        (“Yea”, “Nay”, “Present”, or NaN).
-    scoring_rules : dict of dict
-        Per-bill maps of vote→score, e.g.
-            {
-              "HR.8034": {"Yea": -1, "Nay": 1,  "Present": 0.5},
-              "HR.6090": {"Yea":  2,  "Nay": -2      }
-            }
-    default_score : float
-        Score to assign if a vote is missing or not in the bill’s map.
-
-    Returns
-    -------
-    pd.Series
-        Indexed by member_id, each value is the sum of that member’s
-        scores across all bills.
-    """
-    # 1) Build a DataFrame of numeric scores per (member, bill)
-    score_df = pd.DataFrame(index=vote_matrix.index, columns=vote_matrix.columns)
-
-    for bill_id in vote_matrix.columns:
-        rule = scoring_rules.get(bill_id, {})
-        # map strings → numeric, fill NaN or unmapped with default_score
-        score_df[bill_id] = vote_matrix[bill_id].map(rule).fillna(default_score)
-
-        # 2) Sum across all bills (axis=1) to get each member’s total
-    total_scores = score_df.sum(axis=1)
-    vote_matrix["total_score"] = total_scores
-    vote_matrix = vote_matrix.sort_values(by="total_score", ascending=False)
-
-    vote_matrix["rank"] = (
-        vote_matrix["total_score"]
-          .rank(ascending=False,       # highest score → rank 1
-                method="average")        # dense: no gaps in ranking
-          .astype(int)                # make them ints rather than floats
-    )
-    vote_matrix["percent"] = vote_matrix["rank"] / vote_matrix.shape[0] *100
-    vote_matrix["percent"] = vote_matrix["percent"].round(1)
-
-    # 1) Pop it out (this returns the Series and removes the column)
-    ts = vote_matrix.pop("total_score")
-    # 2) Find where "party" lives
-    pos = vote_matrix.columns.get_loc("party") + 1
-    # 3) Insert total_score back in at that position
-    vote_matrix.insert(pos, "total_score", ts)
-
-    # 1) Pop it out (this returns the Series and removes the column)
-    ts = vote_matrix.pop("rank")
-    # 2) Find where "party" lives
-    pos = vote_matrix.columns.get_loc("total_score") + 1
-    # 3) Insert total_score back in at that position
-    vote_matrix.insert(pos, "rank", ts)
-
-    # 1) Pop it out (this returns the Series and removes the column)
-    ts = vote_matrix.pop("percent")
-    # 2) Find where "party" lives
-    pos = vote_matrix.columns.get_loc("rank") + 1
-    # 3) Insert total_score back in at that position
-    vote_matrix.insert(pos, "percent", ts)
-
-    vote_matrix = vote_matrix.sort_values(by="total_score", ascending=False)
-
-    return vote_matrix
+    # bill_id drops the congress, so (117, hr, N) and (118, hr, N) collide:
+    # keep one row per (member, bill), the one from the latest congress
+    df = (df.sort_values("congress", kind="stable")
+            .drop_duplicates(["member_id", "bill_id"], keep="last"))
 
+    return _vote_matrix(df)
@@ -1,9 +1,170 @@
 # ─── get_votes.py ───────────────────────────────────────────────────────────
-import os, requests, sqlite3, pandas as pd, typing as t
-from xml.etree import ElementTree as ET
+import asyncio, sqlite3, pandas as pd, typing as t
+from itertools import repeat
+from lxml import etree
+
+from votes_common import (
+    ACTIONS_LIMIT, CONNECTOR_LIMIT, CONNECTOR_LIMIT_PER_HOST, REQUEST_TIMEOUT,
+    FetchContext, _bills_filter, _empty_vote_matrix, _make_context,
+    _page_actions, _run, _vote_matrix,
+)
+
+try:
+    import aiohttp
+except ImportError:                     # serial requests fallback
+    aiohttp = None
+
+try:
+    from orjson import loads as json_loads
+except ImportError:                     # stdlib json fallback
+    from json import loads as json_loads
 
 Chamber = t.Literal["h", "s", "both", "house", "senate"]
 
+# fetches return one list per field (SoA), in bill_votes column order
+# after congress / bill_type / bill_number
+VOTE_COLUMNS = ("chamber", "roll_number", "member_id", "name",
+                "state", "party", "role", "vote_position")
+
+XML_CHUNK_SIZE = 64 * 1024              # bytes fed to the XML pull parser at a time
+
+
+# ────────────────────────────────────────────────────────────────────────────
+# 0. helpers shared by the sync and async fetch paths
+# ────────────────────────────────────────────────────────────────────────────
+# running latest roll call per requested chamber: {"House": (rollNumber, action)}
+Latest = dict[str, tuple[int, dict | None]]
+
+
+def _new_latest(chamber: Chamber) -> Latest:
+    c = chamber.lower()
+    return {ch: (-1, None) for ch, keys in (("House",  ("h", "house", "both")),
+                                            ("Senate", ("s", "senate", "both")))
+            if c in keys}
+
+
+def _track_latest(best: Latest, acts: list[dict]) -> None:
+    """Fold one page of actions into `best`."""
+    for a in acts:
+        for rv in a.get("recordedVotes", ()):
+            ch, rn = rv.get("chamber"), rv.get("rollNumber", -1)
+            if ch in best and rn > best[ch][0]:
+                best[ch] = (rn, a)
+
+
+def _paging_done(best: Latest) -> bool:
+    """
+    Actions come newest first, so a chamber's first roll call is already its
+    latest: stop once every requested chamber has one. While any is still
+    missing, keep paging to the end of the history.
+    """
+    return all(a is not None for _, a in best.values())
+
+
+def _latest_roll_calls(best: Latest) -> list[dict]:
+    """The *latest* roll-call action in each requested chamber."""
+    latest = [a for _, a in best.values() if a is not None]
+    if not latest:
+        raise RuntimeError("Requested chambers have no recorded votes for this bill.")
+    return latest
+
+
+def _release(elem) -> None:
+    """Drop a handled iterparse element plus its earlier siblings."""
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
+
+
+def _house_row(rv, cols: dict[str, list]) -> None:
+    """House: <recorded-vote><legislator …>text</legislator><vote>Yea</vote>"""
+    leg = rv.find("legislator"); pos = rv.find("vote")
+    if leg is not None and pos is not None:
+        cols["member_id"].append(leg.attrib.get("name-id"))
+        cols["name"].append((leg.text or "").strip())
+        cols["state"].append(leg.attrib.get("state"))
+        cols["party"].append(leg.attrib.get("party"))
+        cols["vote_position"].append(pos.text.strip())
+
+
+def _senate_row(mem, cols: dict[str, list]) -> None:
+    """Senate: one LIS <member …> element."""
+    member_id = (mem.attrib.get("id")
+                 or mem.attrib.get("member_id")
+                 or mem.attrib.get("lis_member_id")
+                 or mem.attrib.get("name-id")
+                 or mem.attrib.get("name_id"))
+    if member_id is None:
+        return  # skip unusable rows
+
+    vote_pos = (mem.attrib.get("vote_cast")
+                or mem.attrib.get("vote")
+                or mem.findtext(".//vote_cast", default=""))
+
+    full_name = (mem.text or "").strip() or mem.attrib.get("full_name") or " ".join(
+        p for p in [mem.attrib.get("first_name"),
+                    mem.attrib.get("middle_name"),
+                    mem.attrib.get("last_name"),
+                    mem.attrib.get("suffix")] if p)
+
+    cols["member_id"].append(member_id)
+    cols["name"].append(full_name)
+    cols["state"].append(mem.attrib.get("state"))
+    cols["party"].append(mem.attrib.get("party"))
+    cols["vote_position"].append(vote_pos)
+
+
+def _roll_call_format(rc: dict) -> tuple[str, t.Callable, str]:
+    """(element tag, row handler, role) for a roll call's chamber."""
+    if rc["recordedVotes"][0]["chamber"] == "House":
+        return "recorded-vote", _house_row, "Rep"
+    # Senate <member …> elements live in a default namespace; lxml's
+    # "{*}member" matches the local-name in any namespace.
+    return "{*}member", _senate_row, "Sen"
+
+
+def _add_rows(events, add_row: t.Callable, cols: dict[str, list]) -> None:
+    for _, elem in events:
+        add_row(elem, cols)
+        _release(elem)
+
+
+def _finish_columns(rc: dict, cols: dict[str, list], role: str) -> dict[str, list]:
+    """Fill the per-roll-call constant columns alongside the member rows."""
+    n = len(cols["member_id"])
+    cols["chamber"]     = [rc["recordedVotes"][0]["chamber"]] * n   # "House"/"Senate"
+    cols["roll_number"] = [rc["recordedVotes"][0]["rollNumber"]] * n
+    cols["role"]        = [role] * n
+    return cols
+
+
+def _parse_roll_call(rc: dict, source: t.BinaryIO) -> dict[str, list]:
+    """
+    Turn one roll-call's EVS / LIS XML into VOTE_COLUMNS lists.
+    `source` is any binary file-like object – a BytesIO or a streamed
+    response body – and is consumed incrementally.
+    """
+    tag, add_row, role = _roll_call_format(rc)
+    cols: dict[str, list] = {c: [] for c in VOTE_COLUMNS}
+    _add_rows(etree.iterparse(source, events=("end",), tag=tag), add_row, cols)
+    return _finish_columns(rc, cols, role)
+
+
+async def _aparse_roll_call(rc: dict, resp: "aiohttp.ClientResponse") -> dict[str, list]:
+    """
+    _parse_roll_call() over an aiohttp response: chunks are fed to an
+    XMLPullParser as they arrive, so the body is never held whole.
+    """
+    tag, add_row, role = _roll_call_format(rc)
+    cols: dict[str, list] = {c: [] for c in VOTE_COLUMNS}
+    parser = etree.XMLPullParser(events=("end",), tag=tag)
+    async for chunk in resp.content.iter_chunked(XML_CHUNK_SIZE):
+        parser.feed(chunk)
+        _add_rows(parser.read_events(), add_row, cols)
+    parser.close()
+    _add_rows(parser.read_events(), add_row, cols)
+    return _finish_columns(rc, cols, role)
+
 
 # ────────────────────────────────────────────────────────────────────────────
 # 1. fetch_bill_votes  – latest House +/- Senate roll-call(s)
@@ -14,118 +175,93 @@ def fetch_bill_votes(
     bill_number: int,
     chamber: Chamber = "both",
     api_key: str | None = None,
-) -> list[dict]:
+    ctx: FetchContext | None = None,
+) -> dict[str, list]:
     """
-    Return a list of vote-dicts (one per legislator) for the *latest* roll call
-    in each requested chamber.
+    Return the votes on the *latest* roll call in each requested chamber as
+    parallel lists keyed by VOTE_COLUMNS (one entry per legislator).
 
     chamber = "h" | "s" | "both"  (case-insensitive)
+    ctx     = shared FetchContext when looping over many bills
     """
-    want_house  = chamber.lower() in ("h", "house", "both")
-    want_senate = chamber.lower() in ("s", "senate", "both")
+    ctx = ctx or _make_context(api_key)
 
-    key = api_key or os.getenv("CONGRESS_API_KEY")
-    if not key:
-        raise RuntimeError("No API key.  Set CONGRESS_API_KEY or pass api_key.")
-
-    # ── pull all actions (paginate w/ limit+offset) ────────────────────────
-    base = "https://api.congress.gov/v3"
-    url  = f"{base}/bill/{congress}/{bill_type}/{bill_number}/actions"
-    acts, lim, off = [], 250, 0
+    # ── pull actions (paginate w/ limit+offset) until the latest roll ─────
+    #    call(s) are in hand – pages are newest first
+    url  = f"{ctx.base_url}/bill/{congress}/{bill_type}/{bill_number}/actions"
+    best, off = _new_latest(chamber), 0
     while True:
-        resp = requests.get(url, params=dict(format="json", api_key=key,
-                                             limit=lim, offset=off))
+        resp = ctx.session.get(url, params=dict(ctx.params, offset=off))
         resp.raise_for_status()
-        page = (resp.json().get("data", {}).get("actions")
-                or resp.json().get("actions") or [])
-        acts.extend(page)
-        if len(page) < lim:
+        page = _page_actions(json_loads(resp.content))
+        if not page and not off:
+            raise RuntimeError("No actions returned for that bill.")
+        _track_latest(best, page)
+        if len(page) < ACTIONS_LIMIT or _paging_done(best):
             break
-        off += lim
-    if not acts:
-        raise RuntimeError("No actions returned for that bill.")
+        off += ACTIONS_LIMIT
 
-    # ── isolate roll-calls by chamber, pick the *latest* by rollNumber ────
-    house_rolls, sen_rolls = [], []
-    for a in acts:
-        for rv in a.get("recordedVotes", []):
-            if rv.get("chamber") == "House":
-                house_rolls.append(a)
-            elif rv.get("chamber") == "Senate":
-                sen_rolls.append(a)
-
-    latest: list[dict] = []
-    if want_house and house_rolls:
-        latest.append(max(house_rolls, key=lambda a: a["recordedVotes"][0]["rollNumber"]))
-    if want_senate and sen_rolls:
-        latest.append(max(sen_rolls,  key=lambda a: a["recordedVotes"][0]["rollNumber"]))
-    if not latest:
-        raise RuntimeError("Requested chambers have no recorded votes for this bill.")
+    # ── download & parse EVS / LIS XML ────────────────────────────────────
+    votes: dict[str, list] = {c: [] for c in VOTE_COLUMNS}
+    for rc in _latest_roll_calls(best):
+        # stream the body straight into iterparse rather than buffering it
+        with ctx.session.get(rc["recordedVotes"][0]["url"], stream=True) as xml:
+            xml.raise_for_status()
+            xml.raw.decode_content = True           # undo gzip transparently
+            parsed = _parse_roll_call(rc, xml.raw)
+        for c, col in parsed.items():
+            votes[c].extend(col)
+    return votes
 
-    # ── parse EVS / LIS XML ────────────────────────────────────────────────
-    votes: list[dict] = []
-    for rc in latest:
-        chamber_tag = rc["recordedVotes"][0]["chamber"]        # "House"/"Senate"
-        roll_num    = rc["recordedVotes"][0]["rollNumber"]
-        evs_url     = rc["recordedVotes"][0]["url"]
-        root        = ET.fromstring(requests.get(evs_url).content)
-
-        if chamber_tag == "House":
-            # House format: <recorded-vote><legislator …>text</legislator><vote>Yea</vote>
-            for rv in root.findall(".//recorded-vote"):
-                leg = rv.find("legislator"); pos = rv.find("vote")
-                if leg is None or pos is None:
-                    continue
-                votes.append({
-                    "congress": congress, "bill_type": bill_type, "bill_number": bill_number,
-                    "chamber": chamber_tag, "roll_number": roll_num,
-                    "member_id": leg.attrib.get("name-id"),
-                    "name":      (leg.text or "").strip(),
-                    "state":     leg.attrib.get("state"),
-                    "party":     leg.attrib.get("party"),
-                    "role":      "Rep",
-                    "vote_position": pos.text.strip(),
-                })
-        else:
-            # ── Senate XML ───────────────────────────────────────────
-            # Any <member …> element is in a default namespace, so we
-            # iterate over *all* elements and pick the ones whose tag
-            # local-name is "member" (handles namespaces transparently).
-            for mem in (elem for elem in root.iter()
-                        if elem.tag.split('}')[-1] == "member"):
-
-                member_id = (mem.attrib.get("id")
-                             or mem.attrib.get("member_id")
-                             or mem.attrib.get("lis_member_id")
-                             or mem.attrib.get("name-id")
-                             or mem.attrib.get("name_id"))
-                if member_id is None:
-                    continue  # skip unusable rows
-
-                vote_pos = (mem.attrib.get("vote_cast")
-                            or mem.attrib.get("vote")
-                            or mem.findtext(".//vote_cast", default=""))
-
-                full_name = (mem.text or "").strip() or mem.attrib.get("full_name") or " ".join(
-                    p for p in [mem.attrib.get("first_name"),
-                                mem.attrib.get("middle_name"),
-                                mem.attrib.get("last_name"),
-                                mem.attrib.get("suffix")] if p)
-
-                votes.append({
-                    "congress": congress, "bill_type": bill_type, "bill_number": bill_number,
-                    "chamber": chamber_tag, "roll_number": roll_number,
-                    "member_id": member_id,
-                    "name": full_name,
-                    "state": mem.attrib.get("state"),
-                    "party": mem.attrib.get("party"),
-                    "role": "Sen",
-                    "vote_position": vote_pos,
-                })
 
+async def _afetch_bill_votes(
+    ctx: FetchContext,
+    congress: int,
+    bill_type: str,
+    bill_number: int,
+    chamber: Chamber = "both",
+) -> dict[str, list]:
+    """Async twin of fetch_bill_votes() over the context's aiohttp session."""
+    url  = f"{ctx.base_url}/bill/{congress}/{bill_type}/{bill_number}/actions"
+    best, off = _new_latest(chamber), 0
+    while True:
+        async with ctx.session.get(url, params=dict(ctx.params, offset=off)) as resp:
+            resp.raise_for_status()
+            page = _page_actions(json_loads(await resp.read()))
+        if not page and not off:
+            raise RuntimeError("No actions returned for that bill.")
+        _track_latest(best, page)
+        if len(page) < ACTIONS_LIMIT or _paging_done(best):
+            break
+        off += ACTIONS_LIMIT
+
+    votes: dict[str, list] = {c: [] for c in VOTE_COLUMNS}
+    for rc in _latest_roll_calls(best):
+        async with ctx.session.get(rc["recordedVotes"][0]["url"]) as xml:
+            xml.raise_for_status()
+            parsed = await _aparse_roll_call(rc, xml)
+        for c, col in parsed.items():
+            votes[c].extend(col)
     return votes
 
 
+async def _afetch_batch(
+    bills: list[tuple[int, str, int]],
+    chamber: Chamber = "both",
+    api_key: str | None = None,
+) -> list[dict[str, list]]:
+    """Run _afetch_bill_votes() for every bill at once (results in bill order)."""
+    connector = aiohttp.TCPConnector(limit=CONNECTOR_LIMIT,
+                                     limit_per_host=CONNECTOR_LIMIT_PER_HOST)
+    timeout   = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as sess:
+        ctx = _make_context(api_key, sess)
+        return await asyncio.gather(*[
+            _afetch_bill_votes(ctx, c, b, n, chamber=chamber)
+            for c, b, n in bills
+        ])
+
+
 # ────────────────────────────────────────────────────────────────────────────
 # 2. fetch_and_store_batch  – writes vote rows to SQLite
 # ────────────────────────────────────────────────────────────────────────────
@@ -136,6 +272,9 @@ def fetch_and_store_batch(
     api_key: str | None = None,
 ) -> None:
     conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
     cur  = conn.cursor()
     cur.execute("""CREATE TABLE IF NOT EXISTS bill_votes (
         congress INTEGER, bill_type TEXT, bill_number TEXT,
@@ -145,16 +284,19 @@ def fetch_and_store_batch(
         PRIMARY KEY (congress, bill_type, bill_number, chamber, member_id)
     )""")
 
-    for cong, bt, num in bills:
-        rows = fetch_bill_votes(cong, bt, num, chamber=chamber, api_key=api_key)
-        for r in rows:
-            cur.execute("""INSERT OR REPLACE INTO bill_votes
+    if aiohttp is not None:
+        results = _run(_afetch_batch(bills, chamber=chamber, api_key=api_key))
+    else:
+        ctx = _make_context(api_key)
+        results = [fetch_bill_votes(cong, bt, num, chamber=chamber, ctx=ctx)
+                   for cong, bt, num in bills]
+
+    with conn:                          # single transaction for the batch
+        cur.executemany("""INSERT OR REPLACE INTO bill_votes
                            VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
-                        (r["congress"], r["bill_type"], r["bill_number"],
-                         r["chamber"],  r["roll_number"],
-                         r["member_id"], r["name"], r["state"],
-                         r["party"],    r["role"], r["vote_position"]))
-        conn.commit()
+                        (row for (cong, bt, num), cols in zip(bills, results)
+                         for row in zip(repeat(cong), repeat(bt), repeat(num),
+                                        *(cols[c] for c in VOTE_COLUMNS))))
     conn.close()
 
 
@@ -167,21 +309,28 @@ def build_vote_matrix(
     db_path: str = "votes.db"
 ) -> pd.DataFrame:
     """Return a DataFrame: meta-cols + one column per bill_id."""
-    conn = sqlite3.connect(db_path)
-    df   = pd.read_sql_query("SELECT * FROM bill_votes", conn)
-    conn.close()
+    if not bills:                       # no bills → empty matrix, same cols
+        return _empty_vote_matrix()
 
-    # keep requested bills
-    wanted = pd.DataFrame(bills, columns=["congress","bill_type","bill_number"])
-    wanted["bill_number"] = wanted["bill_number"].astype(str)
-    df = df.merge(wanted, on=["congress","bill_type","bill_number"], how="inner")
+    # keep requested bills – filtered in SQL, where the primary key's
+    # (congress, bill_type, bill_number) prefix doubles as the index
+    where, params = _bills_filter(bills)
+    sql = "SELECT * FROM bill_votes WHERE " + where
 
     # filter chamber
     chc = chamber.lower()
     if chc in ("h","house"):
-        df = df[df["chamber"] == "House"]
+        sql += " AND chamber = ?"; params.append("House")
     elif chc in ("s","senate"):
-        df = df[df["chamber"] == "Senate"]
+        sql += " AND chamber = ?"; params.append("Senate")
+
+    conn = sqlite3.connect(db_path)
+    df   = pd.read_sql_query(sql, conn, params=params)
+    conn.close()
+
+    # low-cardinality text → categorical (int codes, not per-row strings)
+    df = df.astype({c: "category" for c in
+                    ("bill_type", "chamber", "state", "party", "role", "vote_position")})
 
     # drop rows with missing ID (just in case)
     df = df[df["member_id"].notna()]
@@ -193,13 +342,5 @@ def build_vote_matrix(
     df = (df.sort_values("roll_number")
             .drop_duplicates(["member_id", "bill_id"], keep="last"))
 
-    meta  = (df[["member_id","name","state","party"]]
-             .drop_duplicates()
-             .set_index("member_id"))
-
-    pivot = df.pivot_table(index="member_id",
-                           columns="bill_id",
-                           values="vote_position",
-                           aggfunc="first")
-
-    return meta.join(pivot)
+    # same member × bill scatter + vote encoding as get_votes / get_votes_dev
+    return _vote_matrix(df)
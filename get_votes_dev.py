@@ -1,21 +1,161 @@
 import os
-import requests
-from xml.etree import ElementTree as ET
+import re
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import repeat
+from lxml import etree
 import sqlite3
 import pandas as pd
+from typing import BinaryIO, List, Dict, Optional, Tuple
 
+from votes_common import (
+    ACTIONS_LIMIT, CONNECTOR_LIMIT, CONNECTOR_LIMIT_PER_HOST, REQUEST_TIMEOUT,
+    FetchContext, _bills_filter, _empty_vote_matrix, _make_context, _page_actions,
+    _run, _vote_matrix,
+)
+from votes_common import compute_member_total_scores  # noqa: F401 (public API)
+
+try:
+    import aiohttp
+except ImportError:             # no aiohttp → fetch bills one at a time via requests
+    aiohttp = None
+
+try:
+    from orjson import loads as json_loads
+except ImportError:             # no orjson → stdlib json (same objects, slower)
+    from json import loads as json_loads
+
+
+# Fields of a fetched vote set, one list per field. The first six are the
+# per-member bill_votes columns, in table order.
+VOTE_COLUMNS = ("member_id", "name", "state", "party", "role", "vote_position",
+                "chamber", "bill_id", "roll_number")
+
+# EVS URLs end in .../rollNNN.xml; only used when the API omits rollNumber
+_ROLL_RE = re.compile(r"roll(\d+)\.xml")
+
+
+def _track_latest(best: Dict[str, tuple], actions: List[Dict]) -> None:
+    """
+    Fold one page of actions into `best`, which maps "House" / "Senate" to
+    the (rollNumber, action) of the HIGHEST rollNumber (latest) roll-call
+    seen so far. We DON’T look at actionCode; the chamber comes from the
+    recordedVotes[].chamber value.
+    """
+    for act in actions:
+        for rv in act.get("recordedVotes", ()):
+            chamber = rv.get("chamber")
+            if chamber in best:
+                roll = _roll_number(rv)
+                if roll > best[chamber][0]:
+                    best[chamber] = (roll, act)
+
+
+def _paging_done(best: Dict[str, tuple]) -> bool:
+    """
+    The API lists actions newest first, so the first roll-call found in a
+    chamber is already its latest: stop paginating once both chambers have
+    one. Until then keep going to the end of the history.
+    """
+    return all(act is not None for _, act in best.values())
+
+
+def _latest_roll_calls(best: Dict[str, tuple], bill_id: str) -> List[tuple]:
+    """
+    Return [(action, "House"), (action, "Senate")] for the *latest* roll-call
+    in each chamber that has one.
+    """
+    latest = [(act, chamber) for chamber, (_, act) in best.items() if act is not None]
+    if not latest:
+        raise RuntimeError(f"No roll-calls at all for {bill_id}.")
+    return latest
+
+
+def _roll_number(recorded_vote: Dict) -> int:
+    """rollNumber of a recordedVotes entry, else parsed from its EVS URL."""
+    if recorded_vote.get("rollNumber") is not None:
+        return int(recorded_vote["rollNumber"])
+    return int(_ROLL_RE.search(recorded_vote["url"]).group(1))
+
+
+def _parse_evs_xml(source: BinaryIO, roll_number: int, chamber: str, bill_id: str) -> Dict[str, List]:
+    """
+    Parse a Clerk EVS XML document into parallel per-field lists (keys in
+    VOTE_COLUMNS), one entry per <recorded-vote>.
+
+    `source` is a binary file-like object, read incrementally. Only the
+    requests path streams the response body into it; the aiohttp path
+    downloads each document whole and parses it from a BytesIO, since the
+    optional process pool needs the raw bytes.
+    """
+    member_ids, names, states, parties, roles, positions = [], [], [], [], [], []
+    for _, rv in etree.iterparse(source, events=("end",), tag="recorded-vote"):
+        leg = rv.find("legislator")
+        vote_elem = rv.find("vote")
+        if leg is not None and vote_elem is not None:
+            member_ids.append(leg.attrib.get("name-id"))
+            names.append(leg.text.strip())
+            states.append(leg.attrib.get("state"))
+            parties.append(leg.attrib.get("party"))
+            roles.append(leg.attrib.get("role"))
+            positions.append(vote_elem.text.strip())
+        # free the finished element (and earlier siblings) as we go
+        rv.clear()
+        while rv.getprevious() is not None:
+            del rv.getparent()[0]
+
+    n = len(member_ids)
+    return dict(zip(VOTE_COLUMNS, (
+        member_ids, names, states, parties, roles, positions,
+        # rollNumber so we can tell House 217 vs Senate 114 apart
+        [chamber] * n, [bill_id] * n, [roll_number] * n,
+    )))
+
+
+# (EVS XML bytes, roll_number, chamber, bill_id) – one downloaded roll call
+EvsPayload = Tuple[bytes, int, str, str]
+
+
+def _parse_evs_bytes(payload: EvsPayload) -> Dict[str, List]:
+    """
+    _parse_evs_xml() on an already-downloaded document. Top-level so it can
+    be shipped to a ProcessPoolExecutor: only the bytes go in and only the
+    column lists come back across the pickle boundary.
+    """
+    content, roll_number, chamber, bill_id = payload
+    return _parse_evs_xml(BytesIO(content), roll_number, chamber, bill_id)
+
+
+def _parse_payloads(payloads: List[EvsPayload], workers: Optional[int] = 1) -> List[Dict[str, List]]:
+    """
+    Parse many EVS documents: in-process when workers == 1 (the default),
+    otherwise in up to `workers` worker processes (None = one per CPU),
+    since parsing is pure CPU under the GIL.
+    """
+    if workers == 1 or len(payloads) < 2:
+        return [_parse_evs_bytes(p) for p in payloads]
+    max_workers = min(len(payloads), workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_parse_evs_bytes, payloads))
+
+
+def _concat_votes(parts) -> Dict[str, List]:
+    """Join several per-roll-call column dicts into one."""
+    votes = {col: [] for col in VOTE_COLUMNS}
+    for part in parts:
+        for col in VOTE_COLUMNS:
+            votes[col].extend(part[col])
+    return votes
 
-import os
-import requests
-from xml.etree import ElementTree as ET
-from typing import List, Dict
 
 def fetch_bill_votes_all_chambers(
     congress: int,
     bill_type: str,
     bill_number: int,
-    api_key: str | None = None
-) -> List[Dict]:
+    api_key: str | None = None,
+    ctx: Optional[FetchContext] = None
+) -> Dict[str, List]:
     """
     Return every legislator’s vote on the *latest* House roll-call **and**
     the *latest* Senate roll-call for a given bill.
@@ -30,14 +170,18 @@ def fetch_bill_votes_all_chambers(
         The bill’s numeric identifier, e.g. 8034.
     api_key    : str | None
         Your Congress.gov key.  If None we look for $CONGRESS_API_KEY.
+    ctx        : FetchContext | None
+        Shared key/session when fetching many bills; overrides api_key.
 
     Returns
     -------
-    votes : list[dict]
-        One dict per *individual* vote, combined across chambers, with:
+    votes : dict[str, list]
+        Parallel lists (one entry per *individual* vote, combined across
+        chambers), keyed by VOTE_COLUMNS:
             member_id      : unique ID (e.g. "A000370")
             name           : legislator’s name
             state, party   : metadata
+            role           : legislator role attribute from the EVS XML
             chamber        : "House" or "Senate"
             bill_id        : e.g. "HR.8034"
             roll_number    : int (to keep House & Senate votes distinct)
@@ -46,110 +190,120 @@ def fetch_bill_votes_all_chambers(
     # ------------------------------------------------------------------
     # 0) House-keeping
     # ------------------------------------------------------------------
-    key = api_key or os.getenv("CONGRESS_API_KEY")
-    if not key:
-        raise RuntimeError("Set CONGRESS_API_KEY or pass api_key.")
+    ctx = ctx or _make_context(api_key)
 
     bill_id = f"{bill_type.upper()}.{bill_number}"
 
     # ------------------------------------------------------------------
-    # 1) Pull the *entire* actions list (paginate w/ limit+offset)
+    # 1) Page through the actions (limit+offset, newest first) until the
+    #    latest roll-call in each chamber is in hand
     # ------------------------------------------------------------------
-    base_url   = "https://api.congress.gov/v3"
-    actions_ep = f"{base_url}/bill/{congress}/{bill_type}/{bill_number}/actions"
+    actions_ep = f"{ctx.base_url}/bill/{congress}/{bill_type}/{bill_number}/actions"
 
-    all_actions, limit, offset = [], 250, 0
+    best = {"House": (-1, None), "Senate": (-1, None)}
+    offset = 0
     while True:
-        resp = requests.get(
-            actions_ep,
-            params=dict(format="json", api_key=key, limit=limit, offset=offset)
-        )
+        resp = ctx.session.get(actions_ep, params=dict(ctx.params, offset=offset))
         resp.raise_for_status()
-        payload = resp.json()
-
-        page_actions = (
-            payload.get("data", {}).get("actions")
-            or payload.get("actions")
-            or []
-        )
-        all_actions.extend(page_actions)
+        page_actions = _page_actions(json_loads(resp.content))
+        if not page_actions and not offset:
+            raise RuntimeError(f"No actions found for {bill_id}.")
+        _track_latest(best, page_actions)
 
-        if len(page_actions) < limit:
-            break                       # no more pages
-        offset += limit                 # fetch next slice
-
-    if not all_actions:
-        raise RuntimeError(f"No actions found for {bill_id}.")
+        if len(page_actions) < ACTIONS_LIMIT or _paging_done(best):
+            break                       # no more pages / both chambers found
+        offset += ACTIONS_LIMIT         # fetch next slice
 
     # ------------------------------------------------------------------
-    # 2) Separate House + Senate roll-call actions.
-    #    We DON’T look at actionCode anymore; instead we check the
-    #    recordedVotes[].chamber value.
+    # 2) For whichever chamber(s) we found, pull the EVS XML & parse votes
     # ------------------------------------------------------------------
-    house_rolls  = []
-    senate_rolls = []
-    for act in all_actions:
-        for rv in act.get("recordedVotes", []):
-            if rv.get("chamber") == "House":
-                house_rolls.append(act)
-            elif rv.get("chamber") == "Senate":
-                senate_rolls.append(act)
-
-    if not house_rolls and not senate_rolls:
-        raise RuntimeError(f"No roll-calls at all for {bill_id}.")
+    all_votes = {col: [] for col in VOTE_COLUMNS}
+    for rc, chamber in _latest_roll_calls(best, bill_id):
+        recorded = rc["recordedVotes"][0]
+        # parse while the body streams in instead of buffering .content
+        with ctx.session.get(recorded["url"], stream=True) as xml:
+            xml.raise_for_status()
+            xml.raw.decode_content = True       # transparently un-gzip
+            parsed = _parse_evs_xml(xml.raw, _roll_number(recorded), chamber, bill_id)
+        for col in VOTE_COLUMNS:
+            all_votes[col].extend(parsed[col])
 
-    # Helper: pick the roll-call with the HIGHEST rollNumber (latest)
-    def pick_latest(rolls):
-        return max(
-            rolls,
-            key=lambda a: a["recordedVotes"][0]["rollNumber"]
-        )
+    return all_votes
 
-    latest_house = pick_latest(house_rolls)  if house_rolls  else None
-    latest_sen   = pick_latest(senate_rolls) if senate_rolls else None
 
-    # ------------------------------------------------------------------
-    # 3) For whichever chamber(s) we found, pull the EVS XML & parse votes
-    # ------------------------------------------------------------------
-    def parse_evs_xml(evs_url, chamber) -> List[Dict]:
-        xml = requests.get(evs_url)
-        xml.raise_for_status()
-        root = ET.fromstring(xml.content)
-
-        vote_rows = []
-        for rv in root.findall(".//recorded-vote"):
-            leg = rv.find("legislator")
-            vote_elem = rv.find("vote")
-            if leg is None or vote_elem is None:
-                continue
-            vote_rows.append({
-                "member_id":    leg.attrib.get("name-id"),
-                "name":         leg.text.strip(),
-                "state":        leg.attrib.get("state"),
-                "party":        leg.attrib.get("party"),
-                "chamber":      chamber,
-                "bill_id":      bill_id,
-                # pull rollNumber so we can tell House 217 vs Senate 114 apart
-                "roll_number":  int(evs_url.split("roll")[-1].split(".")[0]),
-                "vote_position": vote_elem.text.strip(),
-            })
-        return vote_rows
-
-    all_votes = []
-    for rc, chamber in [(latest_house, "House"), (latest_sen, "Senate")]:
-        if rc is None:
-            continue
-        evs_url = rc["recordedVotes"][0]["url"]
-        all_votes.extend(parse_evs_xml(evs_url, chamber))
+async def _afetch_evs_payloads(
+    ctx: FetchContext,
+    congress: int,
+    bill_type: str,
+    bill_number: int
+) -> List[EvsPayload]:
+    """
+    Async twin of fetch_bill_votes_all_chambers(): identical requests, but
+    issued on the context's aiohttp session so many bills can be in flight.
+    Returns the raw EVS documents; parsing is left to _parse_payloads().
+    """
+    bill_id = f"{bill_type.upper()}.{bill_number}"
 
-    return all_votes
+    # 1) actions, paginated until the latest roll-calls are found
+    actions_ep = f"{ctx.base_url}/bill/{congress}/{bill_type}/{bill_number}/actions"
 
-def fetch_and_store_batch(bills, db_path="votes.db", api_key=None):
+    best = {"House": (-1, None), "Senate": (-1, None)}
+    offset = 0
+    while True:
+        async with ctx.session.get(
+            actions_ep, params=dict(ctx.params, offset=offset)
+        ) as resp:
+            resp.raise_for_status()
+            page_actions = _page_actions(json_loads(await resp.read()))
+        if not page_actions and not offset:
+            raise RuntimeError(f"No actions found for {bill_id}.")
+        _track_latest(best, page_actions)
+
+        if len(page_actions) < ACTIONS_LIMIT or _paging_done(best):
+            break
+        offset += ACTIONS_LIMIT
+
+    # 2) EVS XML for the latest roll-call in each chamber
+    payloads = []
+    for rc, chamber in _latest_roll_calls(best, bill_id):
+        recorded = rc["recordedVotes"][0]
+        async with ctx.session.get(recorded["url"]) as xml:
+            xml.raise_for_status()
+            content = await xml.read()
+        payloads.append((content, _roll_number(recorded), chamber, bill_id))
+
+    return payloads
+
+
+async def _afetch_batch(bills, api_key=None) -> List[List[EvsPayload]]:
+    """Fetch all bills concurrently; one payload list per bill, in input order."""
+    connector = aiohttp.TCPConnector(limit=CONNECTOR_LIMIT,
+                                     limit_per_host=CONNECTOR_LIMIT_PER_HOST)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        ctx = _make_context(api_key, session)
+        return await asyncio.gather(*[
+            _afetch_evs_payloads(ctx, congress, bill_type, bill_number)
+            for congress, bill_type, bill_number in bills
+        ])
+
+
+def fetch_and_store_batch(bills, db_path="votes.db", api_key=None, parse_workers=1):
     """
     Given a list of (congress, bill_type, bill_number) tuples,
     fetch each bill’s votes and store them in an SQLite table.
+
+    The XML is parsed in-process by default. With aiohttp available,
+    parse_workers > 1 (or None for one per CPU) parses it in a process
+    pool instead. Starting a pool costs more than parsing a typical
+    batch of ~60 KB House roll calls, so only opt in for large batches;
+    scripts that do so on spawn-start platforms (macOS, Windows) need an
+    ``if __name__ == "__main__":`` guard.
     """
     conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
     c = conn.cursor()
     c.execute("""
     CREATE TABLE IF NOT EXISTS bill_votes (
@@ -165,19 +319,31 @@ def fetch_and_store_batch(bills, db_path="votes.db", api_key=None):
         PRIMARY KEY(congress, bill_type, bill_number, member_id)
     )""")
 
-    for congress, bill_type, bill_number in bills:
-        votes = fetch_bill_votes_all_chambers(congress, bill_type, bill_number, api_key)
-        for v in votes:
-            c.execute("""
-            INSERT OR IGNORE INTO bill_votes (
-                congress, bill_type, bill_number,
-                member_id, name, state, party, role, vote_position
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", (
-                congress, bill_type, bill_number,
-                v["member_id"], v["name"], v["state"],
-                v["party"], v["role"], v["vote_position"]
-            ))
-        conn.commit()
+    if aiohttp is not None:
+        per_bill = _run(_afetch_batch(bills, api_key))
+        parsed = iter(_parse_payloads([p for ps in per_bill for p in ps], parse_workers))
+        results = [_concat_votes(next(parsed) for _ in ps) for ps in per_bill]
+    else:
+        ctx = _make_context(api_key)
+        results = [fetch_bill_votes_all_chambers(congress, bill_type, bill_number, ctx=ctx)
+                   for congress, bill_type, bill_number in bills]
+
+    # Stream every bill's rows through a single executemany, inside one
+    # transaction for the whole batch instead of a commit per bill. Rows are
+    # zipped straight out of the per-field lists.
+    rows = (
+        row
+        for (congress, bill_type, bill_number), votes in zip(bills, results)
+        for row in zip(repeat(congress), repeat(bill_type), repeat(bill_number),
+                       votes["member_id"], votes["name"], votes["state"],
+                       votes["party"], votes["role"], votes["vote_position"])
+    )
+    with conn:
+        c.executemany("""
+        INSERT OR IGNORE INTO bill_votes (
+            congress, bill_type, bill_number,
+            member_id, name, state, party, role, vote_position
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
     conn.close()
 
 
@@ -185,96 +351,26 @@ def build_vote_matrix(bills, db_path="votes.db"):
     """
     Build a matrix (DataFrame) of vote positions: rows=Members, columns=Bills.
     """
+    if not bills:                   # nothing to filter on – empty matrix
+        return _empty_vote_matrix()
+
+    # Only read the requested bills, via the primary-key index
+    where, params = _bills_filter(bills)
+
     conn = sqlite3.connect(db_path)
-    df = pd.read_sql_query("SELECT * FROM bill_votes", conn)
+    df = pd.read_sql_query("SELECT * FROM bill_votes WHERE " + where, conn, params=params)
     conn.close()
 
-    bills_df = pd.DataFrame(bills, columns=["congress","bill_type","bill_number"])
-    bills_df["bill_number"] = bills_df["bill_number"].astype(str)
-    df = df.merge(bills_df, on=["congress","bill_type","bill_number"], how="inner")
-    df["bill_id"] = df["bill_type"].str.upper() + "." + df["bill_number"]
-
-    vote_matrix = df.pivot(index="member_id", columns="bill_id", values="vote_position")
-    rep_info = (
-        df[["name", "state", "party", "member_id"]]
-        .drop_duplicates()
-        .set_index("member_id"))
-    vote_matrix = rep_info.join(vote_matrix)
-    return vote_matrix
-
-def compute_member_total_scores(
-    vote_matrix: pd.DataFrame,
-    scoring_rules: dict[str, dict[str, float]],
-    default_score: float = 0.0
-) -> pd.Series:
-    """
-    Given a vote-string matrix and per-bill scoring rules, compute each
-    member’s total score.
+    # Low-cardinality text columns as categoricals: small integer codes
+    # instead of one Python string per row
+    df = df.astype({col: "category" for col in
+                    ("bill_type", "state", "party", "role", "vote_position")})
 
-    Parameters
-    ----------
-    vote_matrix : pd.DataFrame
-        Rows are member_id, columns are bill_id, values are vote strings
-        (“Yea”, “Nay”, “Present”, or NaN).
-    scoring_rules : dict of dict
-        Per-bill maps of vote→score, e.g.
-            {
-              "HR.8034": {"Yea": -1, "Nay": 1,  "Present": 0.5},
-              "HR.6090": {"Yea":  2,  "Nay": -2      }
-            }
-    default_score : float
-        Score to assign if a vote is missing or not in the bill’s map.
+    df["bill_id"] = df["bill_type"].str.upper() + "." + df["bill_number"]
 
-    Returns
-    -------
-    pd.Series
-        Indexed by member_id, each value is the sum of that member’s
-        scores across all bills.
-    """
-    # 1) Build a DataFrame of numeric scores per (member, bill)
-    score_df = pd.DataFrame(index=vote_matrix.index, columns=vote_matrix.columns)
-
-    for bill_id in vote_matrix.columns:
-        rule = scoring_rules.get(bill_id, {})
-        # map strings → numeric, fill NaN or unmapped with default_score
-        score_df[bill_id] = vote_matrix[bill_id].map(rule).fillna(default_score)
-
-        # 2) Sum across all bills (axis=1) to get each member’s total
-    total_scores = score_df.sum(axis=1)
-    vote_matrix["total_score"] = total_scores
-    vote_matrix = vote_matrix.sort_values(by="total_score", ascending=False)
-
-    vote_matrix["rank"] = (
-        vote_matrix["total_score"]
-          .rank(ascending=False,       # highest score → rank 1
-                method="average")        # dense: no gaps in ranking
-          .astype(int)                # make them ints rather than floats
-    )
-    vote_matrix["percent"] = vote_matrix["rank"] / vote_matrix.shape[0] *100
-    vote_matrix["percent"] = vote_matrix["percent"].round(1)
-
-    # 1) Pop it out (this returns the Series and removes the column)
-    ts = vote_matrix.pop("total_score")
-    # 2) Find where "party" lives
-    pos = vote_matrix.columns.get_loc("party") + 1
-    # 3) Insert total_score back in at that position
-    vote_matrix.insert(pos, "total_score", ts)
-
-    # 1) Pop it out (this returns the Series and removes the column)
-    ts = vote_matrix.pop("rank")
-    # 2) Find where "party" lives
-    pos = vote_matrix.columns.get_loc("total_score") + 1
-    # 3) Insert total_score back in at that position
-    vote_matrix.insert(pos, "rank", ts)
-
-    # 1) Pop it out (this returns the Series and removes the column)
-    ts = vote_matrix.pop("percent")
-    # 2) Find where "party" lives
-    pos = vote_matrix.columns.get_loc("rank") + 1
-    # 3) Insert total_score back in at that position
-    vote_matrix.insert(pos, "percent", ts)
-
-    vote_matrix = vote_matrix.sort_values(by="total_score", ascending=False)
-
-    return vote_matrix
+    # bill_id drops the congress, so (117, hr, N) and (118, hr, N) collide:
+    # keep one row per (member, bill), the one from the latest congress
+    df = (df.sort_values("congress", kind="stable")
+            .drop_duplicates(["member_id", "bill_id"], keep="last"))
 
+    return _vote_matrix(df)
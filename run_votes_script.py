@@ -25,24 +25,6 @@ bills = [
     (118, "hr", 5961),
 ]
 
-
-bills = [
-    (118, "hr", 8034),
-    (118, "hr", 6090),
-    (118, "hr", 340),
-    (118, "hr", 6126),
-    (118, "hr", 2670),
-    (118, "hr", 7217),
-    (118, "hr", 2882),
-    (118, "hr", 5917),
-   # (118, "hr", 815),
-    (118, "hr", 8038),
-    (118, "hr", 8369),
-    (118, "hr", 8070),
-    (118, "hr", 8771),
-    (118, "hr", 8774),
-    (118, "hr", 5961),
-]
 # 2) Fetch & store into votes.db (will create/append the SQLite file)
 fetch_and_store_batch(bills, db_path="votes.db")
 
@@ -67,16 +49,16 @@ weights = [
     (118, "hr", 5961, -1, 0,  1, 0),
 ]
 
-# Build the rules dict
-rules = {}
-for _, bill_type, bill_number, yea_w, pres_w, nay_w, no_w in weights:
-    bill_id = f"{bill_type.upper()}.{bill_number}"
-    rules[bill_id] = {
+# Build the rules dict: bill_id -> weight per vote position
+rules = {
+    f"{bill_type.upper()}.{bill_number}": {
         "Yea":        yea_w,
         "Nay":        nay_w,
         "Present":    pres_w,
         "Not Voting": no_w,
     }
+    for _, bill_type, bill_number, yea_w, pres_w, nay_w, no_w in weights
+}
 
 # Example output:
 # {
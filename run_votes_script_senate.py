@@ -25,12 +25,6 @@ bills = [
     (118, "hr", 5961),
 ]
 
-# 2) Fetch & store into votes.db (will create/append the SQLite file)
-fetch_and_store_batch(bills, db_path="votes.db")
-
-# 3) Build the vote‐matrix DataFrame
-vote_matrix = build_vote_matrix(bills, db_path="votes.db")
-
 # your raw weights list: (congress, bill_type, bill_number, yea, present, nay, no_vote)
 weights = [
     (118, "hr", 8034, -1, 0,  1, 0),
@@ -49,16 +43,16 @@ weights = [
     (118, "hr", 5961, -1, 0,  1, 0),
 ]
 
-# Build the rules dict
-rules = {}
-for _, bill_type, bill_number, yea_w, pres_w, nay_w, no_w in weights:
-    bill_id = f"{bill_type.upper()}.{bill_number}"
-    rules[bill_id] = {
+# Build the rules dict: bill_id -> weight per vote position
+rules = {
+    f"{bill_type.upper()}.{bill_number}": {
         "Yea":        yea_w,
         "Nay":        nay_w,
         "Present":    pres_w,
         "Not Voting": no_w,
     }
+    for _, bill_type, bill_number, yea_w, pres_w, nay_w, no_w in weights
+}
 
 # Example output:
 # {
@@ -66,6 +60,15 @@ for _, bill_type, bill_number, yea_w, pres_w, nay_w, no_w in weights:
 #    …
 # }
 
-# Then pass `rules` into your scorer:
-scores = compute_member_total_scores(vote_matrix, rules, default_score=0.0)
-print(scores.head())
+# Keep the work under the main guard so the script stays safe to import
+# (e.g. by worker processes if fetch_and_store_batch is given parse_workers).
+if __name__ == "__main__":
+    # 2) Fetch & store into votes.db (will create/append the SQLite file)
+    fetch_and_store_batch(bills, db_path="votes.db")
+
+    # 3) Build the vote‐matrix DataFrame
+    vote_matrix = build_vote_matrix(bills, db_path="votes.db")
+
+    # Then pass `rules` into your scorer:
+    scores = compute_member_total_scores(vote_matrix, rules, default_score=0.0)
+    print(scores.head())
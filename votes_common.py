@@ -0,0 +1,270 @@
+"""
+Pieces shared by get_votes, get_votes_dev and get_votes_both: the HTTP
+session and per-batch fetch context, the asyncio runner, and the vote
+matrix encoding / scoring that all three modules build on.
+"""
+import os
+import asyncio
+import warnings
+import requests
+from dataclasses import dataclass, field
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+except ImportError:             # no numba → score with a NumPy gather
+    njit, prange = None, range
+
+
+BASE_URL = "https://api.congress.gov/v3"
+ACTIONS_LIMIT = 250             # actions per page (API maximum)
+
+# Vote strings are stored as small integer codes: 0 = missing, then 1.. in
+# VOTE_POSITIONS order, followed by any other position found in the data
+# ("Guilty", candidates' names in a Speaker election, …) – see _vote_positions
+VOTE_POSITIONS = ("Yea", "Nay", "Present", "Not Voting", "Aye", "No")
+
+# Connection caps for the concurrent (aiohttp) batch fetch
+CONNECTOR_LIMIT          = 16
+CONNECTOR_LIMIT_PER_HOST = 8
+REQUEST_TIMEOUT          = 30   # seconds, per request
+
+# Keep-alive session for the requests path: one connection pool per host
+# (no TCP/TLS handshake per call) and retries on transient API errors.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=(429, 500, 502, 503, 504)),
+))
+
+
+@dataclass
+class FetchContext:
+    """
+    Everything a fetch needs that is the same for every bill in a batch:
+    the resolved API key, the HTTP session (requests or aiohttp) and the
+    actions query-string template.
+    """
+    key: str
+    session: object
+    base_url: str = BASE_URL
+    params: dict = field(init=False)
+
+    def __post_init__(self):
+        self.params = {"format": "json", "api_key": self.key, "limit": ACTIONS_LIMIT}
+
+
+def _make_context(api_key=None, session=None):
+    """Resolve the API key once (argument or $CONGRESS_API_KEY)."""
+    key = api_key or os.getenv("CONGRESS_API_KEY")
+    if not key:
+        raise RuntimeError("Set CONGRESS_API_KEY or pass api_key.")
+    return FetchContext(key=key, session=session or _SESSION)
+
+
+def _page_actions(payload):
+    """Pull the actions array out of one page of the /actions endpoint."""
+    # Try both possible locations for the array
+    return (
+        payload.get("data", {}).get("actions")
+        or payload.get("actions")
+        or []
+    )
+
+
+def _run(coro):
+    """asyncio.run(), but also usable from inside Jupyter's running event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def _empty_vote_matrix():
+    """What build_vote_matrix returns when there is nothing to read."""
+    return pd.DataFrame(columns=["name", "state", "party"],
+                        index=pd.Index([], name="member_id"))
+
+
+def _bills_filter(bills):
+    """
+    WHERE clause + params selecting the requested bills. (congress,
+    bill_type, bill_number) is the leading part of the primary key, so
+    SQLite serves this from its index.
+    """
+    where = "(" + " OR ".join(
+        ["(congress, bill_type, bill_number) = (?, ?, ?)"] * len(bills)
+    ) + ")"
+    params = [v for congress, bill_type, bill_number in bills
+              for v in (congress, bill_type, str(bill_number))]
+    return where, params
+
+
+def _vote_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Members × bills matrix from vote rows that are already unique per
+    (member_id, bill_id), with name/state/party in front.
+
+    The vote codes are scattered straight into a preallocated array –
+    integer indexing, no pivot/groupby – and each bill column is then held
+    as a categorical: one byte per cell, but still displayed as "Yea" / …
+    """
+    positions = _vote_positions(df["vote_position"])
+    vote_code = _vote_codes(df[["vote_position"]], positions)[:, 0]
+    m_row, members = pd.factorize(df["member_id"], sort=True)
+    b_col, bill_ids = pd.factorize(df["bill_id"], sort=True)
+    known = m_row >= 0                      # skip rows with a NULL member_id
+    codes = np.zeros((len(members), len(bill_ids)), dtype=vote_code.dtype)
+    codes[m_row[known], b_col[known]] = vote_code[known]
+    vote_matrix = pd.DataFrame(
+        {bill: pd.Categorical.from_codes(codes[:, j] - 1, positions)
+         for j, bill in enumerate(bill_ids)},
+        index=pd.Index(members, name="member_id"))
+    rep_info = (
+        df[["name", "state", "party", "member_id"]]
+        .drop_duplicates()
+        .set_index("member_id"))
+    return rep_info.join(vote_matrix)
+
+
+def _vote_positions(*columns: pd.Series) -> tuple:
+    """
+    VOTE_POSITIONS followed, in sorted order, by every other vote string
+    present in `columns` (plain or categorical), so no position is lost.
+    """
+    found = set()
+    for col in columns:
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            found.update(col.cat.categories)
+        else:
+            found.update(col.dropna().unique())
+    return VOTE_POSITIONS + tuple(sorted(found.difference(VOTE_POSITIONS)))
+
+
+def _vote_codes(votes: pd.DataFrame, positions: tuple = VOTE_POSITIONS) -> np.ndarray:
+    """
+    (members × bills) codes for a block of vote columns: 1.. in `positions`
+    order, 0 for missing. int8 unless there are too many positions for it.
+    """
+    code_of = {pos: code for code, pos in enumerate(positions, start=1)}
+    dtype = np.int8 if len(positions) <= np.iinfo(np.int8).max else np.int16
+    codes = np.zeros(votes.shape, dtype=dtype)
+    for j, (_, col) in enumerate(votes.items()):
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            # recode category codes; -1 (missing) picks the trailing 0
+            lookup = np.array([code_of.get(c, 0) for c in col.cat.categories] + [0],
+                              dtype=dtype)
+            codes[:, j] = lookup[col.cat.codes.to_numpy()]
+        else:
+            codes[:, j] = col.map(code_of).fillna(0).to_numpy()
+    return codes
+
+
+def _score_numpy(codes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Per-member total: sum over bills j of weights[j, codes[i, j]]."""
+    return weights[np.arange(weights.shape[0])[None, :], codes].sum(axis=1)
+
+
+def _score_kernel(codes, weights):
+    """Loop form of _score_numpy(), compiled by numba when it is installed."""
+    n, m = codes.shape
+    out = np.zeros(n, dtype=np.float64)
+    for i in prange(n):
+        s = 0.0
+        for j in range(m):
+            s += weights[j, codes[i, j]]
+        out[i] = s
+    return out
+
+
+_score = (njit(parallel=True, cache=True)(_score_kernel)
+          if njit is not None else _score_numpy)
+
+
+def compute_member_total_scores(
+    vote_matrix: pd.DataFrame,
+    scoring_rules: dict[str, dict[str, float]],
+    default_score: float = 0.0,
+    vote_positions: tuple | None = None
+) -> pd.Series:
+    """
+    Given a vote-string matrix and per-bill scoring rules, compute each
+    member’s total score.
+
+    Parameters
+    ----------
+    vote_matrix : pd.DataFrame
+        Rows are member_id, columns are bill_id, values are vote strings
+        (“Yea”, “Nay”, “Present”, or NaN) – plain or categorical, as
+        returned by build_vote_matrix.
+    scoring_rules : dict of dict
+        Per-bill maps of vote→score, e.g.
+            {
+              "HR.8034": {"Yea": -1, "Nay": 1,  "Present": 0.5},
+              "HR.6090": {"Yea":  2,  "Nay": -2      }
+            }
+    default_score : float
+        Score to assign if a vote is missing or not in the bill’s map.
+    vote_positions : tuple, optional
+        Every vote string to score. Defaults to VOTE_POSITIONS plus any
+        other position found in vote_matrix. A rule naming a position
+        outside this list is ignored with a warning.
+
+    Returns
+    -------
+    pd.Series
+        Indexed by member_id, each value is the sum of that member’s
+        scores across all bills.
+    """
+    # 1) Per-bill weight table indexed by vote code (column 0 = missing).
+    #    Missing votes and positions a bill's rule omits get default_score.
+    bill_cols = [c for c in vote_matrix.columns if c not in ("name", "state", "party")]
+    positions = vote_positions or _vote_positions(*(vote_matrix[c] for c in bill_cols))
+    code_of = {pos: code for code, pos in enumerate(positions, start=1)}
+    weights = np.full((len(bill_cols), len(positions) + 1), default_score,
+                      dtype=np.float64)
+    for j, bill_id in enumerate(bill_cols):
+        for position, w in scoring_rules.get(bill_id, {}).items():
+            if position in code_of:
+                weights[j, code_of[position]] = w
+            else:
+                warnings.warn(f"{bill_id}: no {position!r} votes to score; "
+                              f"rule ignored")
+
+    # 2) Look up every (member, bill) score and sum across bills – a numba
+    #    kernel when numba is installed, otherwise one NumPy gather
+    codes = _vote_codes(vote_matrix[bill_cols], positions)
+    # The two paths add in different orders; rounding away the last few
+    # bits of float noise makes equal scores tie the same way on both
+    total_scores = np.round(_score(codes, weights), 9)
+
+    # 3) One stable argsort gives both the row order (highest score first)
+    #    and the ranks: tied scores sit next to each other, and each tie
+    #    group gets the average of its positions, truncated to an int
+    order = np.argsort(-total_scores, kind="stable")
+    sorted_scores = total_scores[order]
+    starts = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    ranks = np.repeat((starts + 1 + ends) // 2, ends - starts)
+    vote_matrix = vote_matrix.iloc[order].assign(
+        total_score=sorted_scores,
+        rank=ranks,
+        percent=np.round(ranks / len(order) * 100, 1),
+    )
+
+    # Move the score columns in right after the member info with a single
+    # reindex; rows are already sorted by total_score.
+    lead = ["name", "state", "party", "total_score", "rank", "percent"]
+    new_order = lead + [c for c in vote_matrix.columns if c not in lead]
+    vote_matrix = vote_matrix[new_order]
+
+    return vote_matrix
+